@@ -2,83 +2,171 @@
 Tool for reviewing matches that need a human to check.
 Lets you go through the list and approve or reject matches.
 """
-import json
+import concurrent.futures
+import itertools
+import mmap
+import os
 import sys
-from typing import Dict, List
-from uploader import FirebaseClient
+from dataclasses import dataclass, field, fields
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+import ijson
+import orjson
+from uploader import SOCIAL_KEYS_MAPPING, FirebaseClient
 
+# Save progress after this many items have been processed
+CHECKPOINT_EVERY = 50
 
-def load_review_file(filepath: str) -> List[Dict]:
-    """Load manual review JSON file."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
 
+@dataclass(slots=True)
+class ReviewItem:
+    """One entry from a manual review file."""
+    type: str = 'unknown'
+    score: float = 0
+    company_name: str = ''
+    normalized: str = ''
+    brand_match: Dict = field(default_factory=dict)
+    contact_data: Dict = field(default_factory=dict)
+    parent_name: str = ''
+    parent_brand: Dict = field(default_factory=dict)
+    subsidiary_name: str = ''
+    subsidiary_brand: Dict = field(default_factory=dict)
+    subsidiaries: List = field(default_factory=list)
+    top_matches: List = field(default_factory=list)
+    # Anything else in the entry, plus the original key order for saving
+    extra: Dict[str, Any] = field(default_factory=dict)
+    keys: Tuple[str, ...] = ()
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ReviewItem':
+        """Build an item from a manual review entry."""
+        known = {key: value for key, value in data.items() if key in _REVIEW_ITEM_FIELDS}
+        extra = {key: value for key, value in data.items() if key not in _REVIEW_ITEM_FIELDS}
+        return cls(**known, extra=extra, keys=tuple(data))
+    
+    def to_dict(self) -> Dict:
+        """Turn the item back into the entry it was loaded from."""
+        return {
+            key: getattr(self, key) if key in _REVIEW_ITEM_FIELDS else self.extra[key]
+            for key in self.keys
+        }
+
+
+_REVIEW_ITEM_FIELDS = frozenset(f.name for f in fields(ReviewItem)) - {'extra', 'keys'}
 
-def display_review_item(item: Dict, index: int, total: int):
-    """Display a review item with options."""
-    print("\n" + "="*60)
-    print(f"Item {index + 1} of {total}")
-    print("="*60)
+
+def load_review_file(filepath: str) -> Iterator[ReviewItem]:
+    """
+    Stream items from a manual review JSON file one at a time.
     
-    item_type = item.get('type', 'unknown')
-    score = item.get('score', 0)
+    The file stays open until every item has been read, so read them all
+    before writing back to the same path.
+    """
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"Review file is empty: {filepath}")
+        
+        # Parse from a memory map rather than through Python's file buffering
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for data in ijson.items(mm, 'item', use_float=True):
+                yield ReviewItem.from_dict(data)
+
+
+def save_review_file(filepath: str, items: List[ReviewItem]):
+    """
+    Save review items back to a JSON file.
+    
+    Writes to a temp file first and then swaps it in, so a crash never
+    leaves a half-written file behind.
+    """
+    tmp_path = filepath + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps([item.to_dict() for item in items], option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, filepath)
+
+
+def save_checkpoint(
+    filepath: str,
+    remaining_items: List[ReviewItem],
+    source: BinaryIO,
+    consumed: int
+):
+    """Save the items left so far plus every item not reviewed yet."""
+    source.seek(0)
+    unreviewed = itertools.islice(ijson.items(source, 'item', use_float=True), consumed, None)
+    save_review_file(filepath, remaining_items + [ReviewItem.from_dict(data) for data in unreviewed])
+
+
+def display_review_item(item: ReviewItem, index: int, total: Optional[int] = None):
+    """Display a review item with options, written out in one go."""
+    lines = []
+    lines.append("\n" + "="*60)
+    if total is None:
+        lines.append(f"Item {index + 1}")
+    else:
+        lines.append(f"Item {index + 1} of {total}")
+    lines.append("="*60)
+    
+    item_type = item.type
+    score = item.score
     
     if item_type == 'contact':
-        company_name = item.get('company_name', '')
-        brand_match = item.get('brand_match', {})
+        company_name = item.company_name
+        brand_match = item.brand_match
         brand_name = brand_match.get('name', brand_match.get('company_name', 'Unknown'))
         brand_id = brand_match.get('brand_id', 'Unknown')
         
-        print(f"Type: Contact Information")
-        print(f"Company: {company_name}")
-        print(f"Match: {brand_name} (ID: {brand_id})")
-        print(f"Similarity Score: {score:.1f}%")
-        print(f"\nContact Data:")
-        contact_data = item.get('contact_data', {})
+        lines.append(f"Type: Contact Information")
+        lines.append(f"Company: {company_name}")
+        lines.append(f"Match: {brand_name} (ID: {brand_id})")
+        lines.append(f"Similarity Score: {score:.1f}%")
+        lines.append(f"\nContact Data:")
+        contact_data = item.contact_data
         for key, value in contact_data.items():
             if value:
-                print(f"  {key}: {value}")
+                lines.append(f"  {key}: {value}")
         
-        print(f"\nTop Alternative Matches:")
-        top_matches = item.get('top_matches', [])
+        lines.append(f"\nTop Alternative Matches:")
+        top_matches = item.top_matches
         for i, (alt_brand, alt_score) in enumerate(top_matches[:3], 1):
             alt_name = alt_brand.get('name', alt_brand.get('company_name', 'Unknown'))
             alt_id = alt_brand.get('brand_id', 'Unknown')
-            print(f"  {i}. {alt_name} (ID: {alt_id}) - {alt_score:.1f}%")
+            lines.append(f"  {i}. {alt_name} (ID: {alt_id}) - {alt_score:.1f}%")
     
     elif item_type == 'subsidiary':
-        parent_name = item.get('parent_name', '')
-        subsidiary_name = item.get('subsidiary_name', '')
-        parent_brand = item.get('parent_brand', {})
-        subsidiary_brand = item.get('subsidiary_brand', {})
+        parent_name = item.parent_name
+        subsidiary_name = item.subsidiary_name
+        parent_brand = item.parent_brand
+        subsidiary_brand = item.subsidiary_brand
         
-        print(f"Type: Subsidiary Relationship")
-        print(f"Parent: {parent_name}")
-        print(f"Subsidiary: {subsidiary_name}")
-        print(f"Parent Match: {parent_brand.get('name', 'Unknown')} (ID: {parent_brand.get('brand_id', 'Unknown')})")
-        print(f"Subsidiary Match: {subsidiary_brand.get('name', 'Unknown')} (ID: {subsidiary_brand.get('brand_id', 'Unknown')})")
-        print(f"Similarity Score: {score:.1f}%")
+        lines.append(f"Type: Subsidiary Relationship")
+        lines.append(f"Parent: {parent_name}")
+        lines.append(f"Subsidiary: {subsidiary_name}")
+        lines.append(f"Parent Match: {parent_brand.get('name', 'Unknown')} (ID: {parent_brand.get('brand_id', 'Unknown')})")
+        lines.append(f"Subsidiary Match: {subsidiary_brand.get('name', 'Unknown')} (ID: {subsidiary_brand.get('brand_id', 'Unknown')})")
+        lines.append(f"Similarity Score: {score:.1f}%")
     
     elif item_type == 'subsidiary_parent':
-        parent_name = item.get('parent_name', '')
-        parent_brand = item.get('parent_brand', {})
-        subsidiaries = item.get('subsidiaries', [])
+        parent_name = item.parent_name
+        parent_brand = item.parent_brand
+        subsidiaries = item.subsidiaries
         
-        print(f"Type: Subsidiary Parent")
-        print(f"Parent: {parent_name}")
-        print(f"Parent Match: {parent_brand.get('name', 'Unknown')} (ID: {parent_brand.get('brand_id', 'Unknown')})")
-        print(f"Similarity Score: {score:.1f}%")
-        print(f"Subsidiaries: {len(subsidiaries)}")
+        lines.append(f"Type: Subsidiary Parent")
+        lines.append(f"Parent: {parent_name}")
+        lines.append(f"Parent Match: {parent_brand.get('name', 'Unknown')} (ID: {parent_brand.get('brand_id', 'Unknown')})")
+        lines.append(f"Similarity Score: {score:.1f}%")
+        lines.append(f"Subsidiaries: {len(subsidiaries)}")
     
-    print("\nOptions:")
-    print("  [a] Accept match")
-    print("  [r] Reject match")
-    print("  [s] Skip (review later)")
-    print("  [q] Quit and save progress")
+    lines.append("\nOptions:")
+    lines.append("  [a] Accept match")
+    lines.append("  [r] Reject match")
+    lines.append("  [s] Skip (review later)")
+    lines.append("  [q] Quit and save progress")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def process_review_item(
-    item: Dict,
+    item: ReviewItem,
     choice: str,
     firebase_client: FirebaseClient,
     dry_run: bool = False
@@ -97,30 +185,18 @@ def process_review_item(
         return True  # Processed (rejected)
     
     if choice.lower() == 'a':
-        item_type = item.get('type')
+        item_type = item.type
         
         if item_type == 'contact':
-            brand_id = item.get('brand_match', {}).get('brand_id')
-            contact_data = item.get('contact_data', {})
+            brand_id = item.brand_match.get('brand_id')
+            contact_data = item.contact_data
             
-            # Map contact fields to social keys (same as in uploader)
-            social_keys_mapping = {
-                'twitter_url': 'twitter',
-                'facebook_url': 'facebook',
-                'bluesky_url': 'bluesky',
-                'ir_email': 'ir_email',
-                'cs_email': 'cs_email',
-                'ir_page': 'ir_page',
-                'cs_page': 'cs_page',
-                'domain': 'website',
+            social_updates = {
+                firebase_key: value
+                for csv_field, firebase_key in SOCIAL_KEYS_MAPPING
+                if (value := contact_data.get(csv_field)) and (value := value.strip())
             }
             
-            social_updates = {}
-            for csv_field, firebase_key in social_keys_mapping.items():
-                value = contact_data.get(csv_field, '').strip()
-                if value:
-                    social_updates[firebase_key] = value
-            
             if social_updates:
                 success = firebase_client.update_brand_social(
                     brand_id, social_updates, dry_run=dry_run
@@ -133,9 +209,9 @@ def process_review_item(
                     return False
         
         elif item_type == 'subsidiary':
-            parent_brand_id = item.get('parent_brand', {}).get('brand_id')
-            subsidiary_brand_id = item.get('subsidiary_brand', {}).get('brand_id')
-            parent_name = item.get('parent_name', '')
+            parent_brand_id = item.parent_brand.get('brand_id')
+            subsidiary_brand_id = item.subsidiary_brand.get('brand_id')
+            parent_name = item.parent_name
             
             # Update parent's subsidiaries map
             firebase_client.update_parent_subsidiaries(
@@ -158,6 +234,102 @@ def process_review_item(
     return False
 
 
+def read_choices(choices_file: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield review choices one at a time.
+    
+    Choices come from choices_file if given, otherwise from stdin - prompting
+    when it's a terminal, or reading line by line when it's piped in.
+    """
+    if choices_file:
+        with open(choices_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield line.strip().lower()
+    elif sys.stdin.isatty():
+        while True:
+            try:
+                yield input("\nEnter choice [a/r/s/q]: ").strip().lower()
+            except EOFError:
+                return
+    else:
+        for line in sys.stdin:
+            yield line.strip().lower()
+
+
+def written_paths(item: ReviewItem, firebase_client: FirebaseClient) -> List[str]:
+    """Paths of the documents that accepting an item writes to."""
+    if item.type == 'contact':
+        brand_ids = [item.brand_match.get('brand_id')]
+    elif item.type == 'subsidiary':
+        brand_ids = [item.parent_brand.get('brand_id'), item.subsidiary_brand.get('brand_id')]
+    else:
+        brand_ids = []
+    
+    return [firebase_client.brand_path(brand_id) for brand_id in brand_ids if brand_id]
+
+
+def failed_writes(
+    accepted: List[Tuple[ReviewItem, List[str]]],
+    failed_paths: List[str]
+) -> List[ReviewItem]:
+    """
+    Pick out the accepted items whose updates weren't written.
+    
+    accepted holds each item accepted since the last flush, with the paths
+    its updates went to.
+    """
+    failed_paths = set(failed_paths)
+    failed_items = [
+        item for item, paths in accepted
+        if not failed_paths.isdisjoint(paths)
+    ]
+    
+    if failed_paths:
+        print(f"Error writing some updates to Firebase - kept {len(failed_items)} items to review again")
+    return failed_items
+
+
+def flush_updates(
+    firebase_client: FirebaseClient,
+    accepted: List[Tuple[ReviewItem, List[str]]]
+) -> List[ReviewItem]:
+    """
+    Write any queued updates to Firebase, then empty accepted.
+    
+    Returns:
+        The accepted items whose updates weren't written, to review again
+    """
+    failed_items = failed_writes(accepted, firebase_client.flush())
+    accepted.clear()
+    return failed_items
+
+
+def checkpoint_after_writes(
+    written: concurrent.futures.Future,
+    accepted: List[Tuple[ReviewItem, List[str]]],
+    write_failures: List[ReviewItem],
+    filepath: str,
+    remaining_items: List[ReviewItem],
+    source: BinaryIO,
+    consumed: int
+):
+    """
+    Wait for a flush_async() to finish, then save a checkpoint.
+    
+    Accepted items whose updates failed are added to write_failures, and
+    saved with the rest so the checkpoint never drops them.
+    """
+    write_failures.extend(failed_writes(accepted, written.result()))
+    save_checkpoint(filepath, remaining_items + write_failures, source, consumed)
+
+
+def report_checkpoint_error(future: concurrent.futures.Future):
+    """Say so if a background checkpoint couldn't be saved."""
+    error = future.exception()
+    if error is not None:
+        print(f"Error saving checkpoint: {str(error)}")
+
+
 def main():
     """Main entry point for review tool."""
     import argparse
@@ -168,34 +340,51 @@ def main():
     parser.add_argument('--firebase-project', help='Firebase project ID')
     parser.add_argument('--dry-run', action='store_true', help='Dry run mode')
     parser.add_argument('--output-file', help='Output file for remaining items (default: overwrite input)')
+    parser.add_argument('--choices-file', help='File with one choice (a/r/s/q) per line to use instead of asking')
     
     args = parser.parse_args()
     
-    # Load review items
-    print(f"Loading review items from: {args.review_file}")
+    # Items are streamed from the file as they're reviewed
+    print(f"Reading review items from: {args.review_file}")
     review_items = load_review_file(args.review_file)
-    print(f"Loaded {len(review_items)} items for review")
     
     # Initialize Firebase
     firebase_client = FirebaseClient()
     firebase_client.initialize(args.firebase_credentials, args.firebase_project)
     
-    # Process items
+    # Process items - running out of choices counts as quitting
+    choices = read_choices(args.choices_file)
+    output_file = args.output_file or args.review_file
     remaining_items = []
     processed_count = 0
     
+    # Accepted items aren't done until their updates are written; ones that
+    # fail are kept for another review
+    accepted = []
+    write_failures = []
+    
+    # Checkpoints wait for the updates and are written in the background from a
+    # separate handle on the original file, which stays readable even after
+    # it's replaced on disk
+    checkpoint_source = open(args.review_file, 'rb')
+    checkpoints = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    
     for i, item in enumerate(review_items):
-        display_review_item(item, i, len(review_items))
+        display_review_item(item, i)
         
         while True:
-            choice = input("\nEnter choice [a/r/s/q]: ").strip().lower()
+            choice = next(choices, 'q')
             
             if choice == 'q':
+                checkpoints.shutdown(wait=True)
+                checkpoint_source.close()
+                write_failures.extend(flush_updates(firebase_client, accepted))
+                
                 # Save remaining items and exit
-                remaining_items.extend(review_items[i:])
-                output_file = args.output_file or args.review_file
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(remaining_items, f, indent=2, ensure_ascii=False)
+                remaining_items.extend(write_failures)
+                remaining_items.append(item)
+                remaining_items.extend(review_items)
+                save_review_file(output_file, remaining_items)
                 print(f"\nSaved {len(remaining_items)} remaining items to {output_file}")
                 sys.exit(0)
             
@@ -203,21 +392,35 @@ def main():
                 processed = process_review_item(item, choice, firebase_client, args.dry_run)
                 if processed:
                     processed_count += 1
+                    if choice == 'a' and not args.dry_run:
+                        accepted.append((item, written_paths(item, firebase_client)))
+                    
+                    if processed_count % CHECKPOINT_EVERY == 0:
+                        checkpoint = checkpoints.submit(
+                            checkpoint_after_writes, firebase_client.flush_async(),
+                            list(accepted), write_failures, output_file,
+                            list(remaining_items), checkpoint_source, i + 1
+                        )
+                        checkpoint.add_done_callback(report_checkpoint_error)
+                        accepted.clear()
                 else:
                     remaining_items.append(item)
                 break
             
             print("Invalid choice. Please enter 'a', 'r', 's', or 'q'")
     
+    checkpoints.shutdown(wait=True)
+    checkpoint_source.close()
+    write_failures.extend(flush_updates(firebase_client, accepted))
+    remaining_items.extend(write_failures)
+    
     # Save any remaining items
-    output_file = args.output_file or args.review_file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(remaining_items, f, indent=2, ensure_ascii=False)
+    save_review_file(output_file, remaining_items)
     
     print(f"\n{'='*60}")
     print(f"Review Complete")
     print(f"{'='*60}")
-    print(f"Processed: {processed_count}")
+    print(f"Processed: {processed_count - len(write_failures)}")
     print(f"Remaining: {len(remaining_items)}")
     print(f"Saved remaining items to: {output_file}")
     
@@ -3,44 +3,70 @@ Main script that uploads contact info and subsidiaries to Firebase.
 This is what you run to process your CSV files.
 Everything is in one file for simplicity.
 """
+import asyncio
+import concurrent.futures
 import csv
-import json
+import itertools
+import logging
+import os
 import sys
 import re
-from typing import Dict, List, Optional, Tuple, Any
-from collections import defaultdict
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Any, Union
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, firestore_async
+import numpy as np
+import orjson
 import rapidfuzz
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+
+logger = logging.getLogger(__name__)
+
+# pyarrow is optional - with it, CSVs are loaded and filtered a column at a time
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
 
 
 # ============================================================================
 # DATA FILTERING
 # ============================================================================
 
+NARRATIVE_PATTERNS = [
+    r'the following is a list',
+    r'omitting subsidiaries',
+    r'considered in the aggregate',
+    r'company name',
+    r'^name$',
+    r'subsidiaries? of',
+    r'as of \w+ \d+',
+]
+
+_NARRATIVE_RE = re.compile(
+    '|'.join(f'(?:{pattern})' for pattern in NARRATIVE_PATTERNS),
+    re.IGNORECASE
+)
+
+_HEADER_LABELS = frozenset(['name', 'company', 'subsidiary', 'company name'])
+
+
 def is_extraction_error(row: Dict[str, Any]) -> bool:
     """Check if a row looks like an extraction error."""
     subsidiary_raw = str(row.get('subsidiary_name_raw', '')).strip()
     subsidiary_clean = str(row.get('subsidiary_name_clean', '')).strip()
     
-    narrative_patterns = [
-        r'the following is a list',
-        r'omitting subsidiaries',
-        r'considered in the aggregate',
-        r'company name',
-        r'^name$',
-        r'subsidiaries? of',
-        r'as of \w+ \d+',
-    ]
-    
-    for pattern in narrative_patterns:
-        if re.search(pattern, subsidiary_raw, re.IGNORECASE) or \
-           re.search(pattern, subsidiary_clean, re.IGNORECASE):
-            return True
+    if _NARRATIVE_RE.search(subsidiary_raw) or _NARRATIVE_RE.search(subsidiary_clean):
+        return True
     
-    if subsidiary_clean.lower() in ['name', 'company', 'subsidiary', 'company name']:
+    if subsidiary_clean.lower() in _HEADER_LABELS:
         return True
     
     return False
@@ -85,6 +111,167 @@ def filter_subsidiary_data(rows: List[Dict[str, Any]]) -> tuple:
     return filtered_rows, filtered_count, incomplete_count
 
 
+# Columns the uploader reads from each CSV; anything else is left unparsed
+CONTACT_COLUMNS = (
+    'company_clean', 'domain', 'ir_page', 'ir_email', 'cs_page', 'cs_email',
+    'twitter_url', 'facebook_url', 'bluesky_url',
+)
+SUBSIDIARY_COLUMNS = (
+    'company_name', 'subsidiary_count', 'subsidiary_name_raw', 'subsidiary_name_clean',
+)
+
+# Contact CSV fields and the social keys they're saved under. A tuple of
+# pairs, since it's only ever walked through once per contact
+SOCIAL_KEYS_MAPPING = (
+    ('twitter_url', 'twitter'),
+    ('facebook_url', 'facebook'),
+    ('bluesky_url', 'bluesky'),
+    ('ir_email', 'ir_email'),
+    ('cs_email', 'cs_email'),
+    ('ir_page', 'ir_page'),
+    ('cs_page', 'cs_page'),
+    ('domain', 'website'),
+)
+
+# How much of a CSV file Arrow parses at a time
+CSV_BLOCK_SIZE = 8 << 20
+
+
+def read_csv_header(filepath: str) -> List[str]:
+    """Get the column names from the first line of a CSV file."""
+    with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def iter_csv_batches(filepath: str, columns: Tuple[str, ...]) -> Iterator['pa.RecordBatch']:
+    """
+    Stream a CSV file as Arrow record batches.
+    
+    Only the given columns are parsed, all as text. Columns the file
+    doesn't have are left out, and so are rows with too few or too many fields.
+    """
+    header = read_csv_header(filepath)
+    include = [name for name in columns if name in header]
+    if not include:
+        return
+    
+    # A row with the wrong number of fields is skipped and counted, rather
+    # than failing the whole file
+    skipped = 0
+    
+    def skip_invalid_row(row) -> str:
+        nonlocal skipped
+        skipped += 1
+        return 'skip'
+    
+    # Memory-mapped, so Arrow parses straight from the page cache
+    reader = pa_csv.open_csv(
+        pa.memory_map(filepath, 'r'),
+        read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+        parse_options=pa_csv.ParseOptions(
+            newlines_in_values=True, invalid_row_handler=skip_invalid_row
+        ),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=include,
+            column_types={name: pa.string() for name in include}
+        )
+    )
+    yield from reader
+    
+    if skipped:
+        print(f"Skipped {skipped} malformed rows in {filepath}")
+
+
+def iter_csv_rows(filepath: str, columns: Tuple[str, ...]) -> Iterator[Dict[str, Any]]:
+    """
+    Read a CSV file row by row with csv.DictReader, keeping only the given columns.
+    
+    Rows with too few or too many fields are skipped, as iter_csv_batches does.
+    """
+    skipped = 0
+    
+    with open(filepath, 'r', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            # DictReader fills missing fields with None and puts extra ones under None
+            if None in row or None in row.values():
+                skipped += 1
+                continue
+            yield {name: row[name] for name in columns if name in row}
+    
+    if skipped:
+        print(f"Skipped {skipped} malformed rows in {filepath}")
+
+
+def _text_column(table: 'pa.Table', name: str) -> 'pa.ChunkedArray':
+    """Get a text column, or empty strings if it's missing."""
+    if name not in table.column_names:
+        return pa.chunked_array([pa.array([''] * table.num_rows, pa.string())])
+    return table[name]
+
+
+def _stripped_column(table: 'pa.Table', name: str) -> 'pa.ChunkedArray':
+    """Get a text column with whitespace trimmed, or empty strings if it's missing."""
+    return pc.utf8_trim_whitespace(_text_column(table, name))
+
+
+# Rows whose fields are all printable ASCII get the same answers from Arrow's
+# regexes (RE2, whose \w and \d only know ASCII) as from re and int()
+_PLAIN_TEXT_PATTERN = r'^[\x20-\x7e]*$'
+
+# Matches plain subsidiary counts that int() reads as a number above zero
+_POSITIVE_COUNT_PATTERN = r'^\+?(?:0_?)*[1-9](?:_?[0-9])*$'
+
+
+def filter_subsidiary_table(table: 'pa.Table') -> tuple:
+    """
+    Filter out bad subsidiary data, a whole column at a time.
+    
+    Same rules as filter_subsidiary_data, for rows loaded with iter_csv_batches.
+    Rows with anything but printable ASCII are checked one at a time.
+    """
+    subsidiary_raw = _stripped_column(table, 'subsidiary_name_raw')
+    subsidiary_clean = _stripped_column(table, 'subsidiary_name_clean')
+    subsidiary_count = _stripped_column(table, 'subsidiary_count')
+    
+    is_error = pc.or_(
+        pc.or_(
+            pc.match_substring_regex(subsidiary_raw, _NARRATIVE_RE.pattern, ignore_case=True),
+            pc.match_substring_regex(subsidiary_clean, _NARRATIVE_RE.pattern, ignore_case=True)
+        ),
+        pc.is_in(pc.utf8_lower(subsidiary_clean), value_set=pa.array(sorted(_HEADER_LABELS)))
+    )
+    is_incomplete = pc.and_(
+        pc.invert(is_error),
+        pc.and_(
+            pc.match_substring_regex(subsidiary_count, _POSITIVE_COUNT_PATTERN),
+            pc.equal(subsidiary_raw, '')
+        )
+    )
+    
+    is_plain = pc.and_(
+        pc.and_(
+            pc.match_substring_regex(_text_column(table, 'subsidiary_name_raw'), _PLAIN_TEXT_PATTERN),
+            pc.match_substring_regex(_text_column(table, 'subsidiary_name_clean'), _PLAIN_TEXT_PATTERN)
+        ),
+        pc.match_substring_regex(_text_column(table, 'subsidiary_count'), _PLAIN_TEXT_PATTERN)
+    )
+    if not pc.all(is_plain).as_py():
+        is_error = is_error.to_numpy(zero_copy_only=False).copy()
+        is_incomplete = is_incomplete.to_numpy(zero_copy_only=False).copy()
+        other = np.flatnonzero(~is_plain.to_numpy(zero_copy_only=False))
+        for i, row in zip(other, table.take(other).to_pylist()):
+            is_error[i] = is_extraction_error(row)
+            is_incomplete[i] = not is_error[i] and is_incomplete_subsidiary_data(row)
+        is_error = pa.array(is_error)
+        is_incomplete = pa.array(is_incomplete)
+    
+    filtered_count = pc.sum(is_error).as_py() or 0
+    incomplete_count = pc.sum(is_incomplete).as_py() or 0
+    keep = pc.invert(pc.or_(is_error, is_incomplete))
+    
+    return table.filter(keep), filtered_count, incomplete_count
+
+
 def filter_contacts_data(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Filter contacts data - currently just returns all rows."""
     return rows
@@ -104,37 +291,162 @@ COMPANY_SUFFIXES = [
     r'\bintl\.?\b', r'\binternational\b', r'\bglobal\b',
 ]
 
+# Symbols spelled out as words and separators turned into spaces, in one pass
+_SYMBOL_TRANS = str.maketrans({
+    '&': ' and ',
+    '@': ' at ',
+    '+': ' plus ',
+    '/': ' ',
+    '-': ' ',
+    '_': ' ',
+})
+
+# Compiled once so each name is scanned for every suffix in a single pass
+_SUFFIX_RE = re.compile('|'.join(COMPANY_SUFFIXES), re.IGNORECASE)
+_PUNCT_RE = re.compile(r'[^\w\s]')
+_DIGIT_RE = re.compile(r'\b\d+\b')
+_WS_RE = re.compile(r'\s+')
+
 
 def normalize_company_name(name: Optional[str]) -> str:
     """Clean up company names so they're easier to match."""
     if not name or not isinstance(name, str):
         return ""
     
-    normalized = name.lower().strip()
-    normalized = normalized.replace('&', ' and ')
-    normalized = normalized.replace('@', ' at ')
-    normalized = normalized.replace('+', ' plus ')
-    normalized = normalized.replace('/', ' ')
-    normalized = normalized.replace('-', ' ')
-    normalized = normalized.replace('_', ' ')
-    normalized = re.sub(r'[^\w\s]', ' ', normalized)
+    normalized = name.lower().strip().translate(_SYMBOL_TRANS)
+    normalized = _PUNCT_RE.sub(' ', normalized)
+    normalized = _SUFFIX_RE.sub(' ', normalized)
+    normalized = _DIGIT_RE.sub('', normalized)
+    normalized = _WS_RE.sub(' ', normalized).strip()
     
-    for suffix_pattern in COMPANY_SUFFIXES:
-        normalized = re.sub(suffix_pattern, ' ', normalized, flags=re.IGNORECASE)
+    return normalized
+
+
+# The same names turn up in the brands and in both CSVs, so each one is only normalized once
+_norm = lru_cache(maxsize=None)(normalize_company_name)
+
+# What str.strip() and re's \s count as whitespace in ASCII text. Arrow's
+# regexes (RE2) leave \v and \x1c-\x1f out of \s, so they're spelled out
+_ASCII_WHITESPACE = '\t\n\x0b\x0c\r \x1c\x1d\x1e\x1f'
+_ASCII_WHITESPACE_CLASS = r'\t\n\x0b\x0c\r \x1c-\x1f'
+
+
+def normalize_company_names(names: List[Any]) -> List[str]:
+    """
+    Clean up a whole list of company names, same as normalize_company_name.
     
-    normalized = re.sub(r'\b\d+\b', '', normalized)
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    With pyarrow, ASCII names are cleaned up a column at a time. RE2's \w,
+    \d and \b only know ASCII, so they only agree with re for ASCII text;
+    other names go through normalize_company_name one by one.
+    """
+    texts = [name if isinstance(name, str) else '' for name in names]
+    if pa is None:
+        return [_norm(text) for text in texts]
     
-    return normalized
+    column = pa.array(texts, pa.string())
+    normalized = pc.utf8_trim(pc.ascii_lower(column), characters=_ASCII_WHITESPACE)
+    for char, replacement in _SYMBOL_TRANS.items():
+        normalized = pc.replace_substring(normalized, chr(char), replacement)
+    normalized = pc.replace_substring_regex(normalized, rf'[^\w{_ASCII_WHITESPACE_CLASS}]', ' ')
+    normalized = pc.replace_substring_regex(normalized, _SUFFIX_RE.pattern, ' ')
+    normalized = pc.replace_substring_regex(normalized, _DIGIT_RE.pattern, '')
+    normalized = pc.replace_substring_regex(normalized, f'[{_ASCII_WHITESPACE_CLASS}]+', ' ')
+    normalized = pc.utf8_trim(normalized, characters=' ')
+    
+    return [
+        value if is_ascii else _norm(text)
+        for value, is_ascii, text in zip(
+            normalized.to_pylist(), pc.string_is_ascii(column).to_pylist(), texts
+        )
+    ]
 
 
 # ============================================================================
 # FUZZY MATCHING
 # ============================================================================
 
+@dataclass
+class BrandIndex:
+    """
+    Brands laid out column by column for matching.
+    
+    Entry i of each list is the same brand. For each character, char_counts
+    holds the positions of the brands whose names have it and how many times
+    it appears in each - only those brands, so rare characters (say in CJK
+    names) take no room for every other brand. Names must already be normalized.
+    """
+    names: List[str]
+    lengths: np.ndarray
+    ids: List[Optional[str]]
+    datas: List[Dict]
+    by_first_token: Dict[str, List[int]]
+    char_counts: Dict[str, Tuple[np.ndarray, np.ndarray]]
+    
+    @classmethod
+    def build(cls, candidates: Iterable[Tuple[str, Dict]]) -> 'BrandIndex':
+        """Build an index from (normalized_name, brand_data) pairs."""
+        names = []
+        datas = []
+        for name, brand_data in candidates:
+            names.append(name)
+            datas.append(brand_data)
+        
+        by_first_token = defaultdict(list)
+        char_positions = defaultdict(list)
+        char_totals = defaultdict(list)
+        for i, name in enumerate(names):
+            if name:
+                by_first_token[name.split(' ', 1)[0]].append(i)
+            
+            for char, count in Counter(name).items():
+                char_positions[char].append(i)
+                char_totals[char].append(count)
+        
+        char_counts = {
+            char: (
+                np.array(positions, dtype=np.intp),
+                np.array(char_totals[char], dtype=np.int32)
+            )
+            for char, positions in char_positions.items()
+        }
+        
+        return cls(
+            names=names,
+            lengths=np.fromiter(map(len, names), dtype=np.int32, count=len(names)),
+            ids=[brand_data.get('brand_id') for brand_data in datas],
+            datas=datas,
+            by_first_token=dict(by_first_token),
+            char_counts=char_counts,
+        )
+    
+    def __len__(self) -> int:
+        return len(self.names)
+
+
 class FuzzyMatcher:
     """Matches company names even when they're not exactly the same."""
     
+    # A pair's similarity is the best score from any of these
+    SCORERS = (fuzz.ratio, fuzz.partial_ratio, fuzz.token_sort_ratio, fuzz.token_set_ratio)
+    
+    # A pair can't line up more characters than the names have in common, so
+    # these can't score higher than 200 * shared / (len1 + len2)...
+    WHOLE_BOUNDED_SCORERS = (fuzz.ratio, fuzz.token_sort_ratio)
+    
+    # ...and this one, which lines the shorter name up against part of the
+    # longer, can't score higher than 200 * shared / (shorter + shared)
+    PARTIAL_BOUNDED_SCORERS = (fuzz.partial_ratio,)
+    
+    # How many brands are scored first to set a cutoff when finding the top matches
+    TOP_MATCH_SEEDS = 32
+    
+    # The most queries find_best_matches scores at once...
+    QUERY_CHUNK_SIZE = 1024
+    
+    # ...and the most memory their scores can take, counting the running best
+    # and one scorer's cdist result (both float64 per query and brand)
+    SCORE_MEMORY_BUDGET = 256 << 20
+    
     def __init__(
         self,
         auto_accept_threshold: float = 90.0,
@@ -144,74 +456,351 @@ class FuzzyMatcher:
         self.auto_accept_threshold = auto_accept_threshold
         self.manual_review_threshold = manual_review_threshold
         self.reject_threshold = reject_threshold
+        self._prepared = None
+        self._bound = None
     
-    def calculate_similarity(self, str1: str, str2: str) -> float:
-        """Calculate how similar two strings are."""
+    def bind(self, candidates: Union[BrandIndex, List[Tuple[str, Dict]]]) -> BrandIndex:
+        """
+        Set the brands to match against when no candidates are passed in.
+        
+        Everything derived from them is worked out here, once, and reused by
+        every match after.
+        """
+        self._bound = self.preprocess(candidates)
+        return self._bound
+    
+    def preprocess(
+        self,
+        candidates: Optional[Union[BrandIndex, List[Tuple[str, Dict]]]] = None
+    ) -> BrandIndex:
+        """
+        Get a BrandIndex for the candidates, or the bound one if None.
+        
+        A plain candidate list is only indexed once, so don't change it in
+        place between calls.
+        """
+        if candidates is None:
+            if self._bound is None:
+                raise Exception("No brands to match against. Call bind() first.")
+            return self._bound
+        
+        if isinstance(candidates, BrandIndex):
+            return candidates
+        
+        if self._prepared is None or self._prepared[0] is not candidates:
+            self._prepared = (candidates, BrandIndex.build(candidates))
+        return self._prepared[1]
+    
+    def _shortlist(self, query: str, index: BrandIndex) -> Optional[np.ndarray]:
+        """
+        Narrow the brands down to ones whose first word appears in the query.
+        
+        Returns:
+            Brand positions in their original order, or None to check them all
+        """
+        positions = set()
+        for token in set(query.split()):
+            positions.update(index.by_first_token.get(token, ()))
+        
+        if not positions:
+            return None
+        return np.fromiter(sorted(positions), dtype=np.intp, count=len(positions))
+    
+    def calculate_similarity(
+        self,
+        str1: str,
+        str2: str,
+        score_cutoff: Optional[float] = None
+    ) -> float:
+        """
+        Calculate how similar two strings are.
+        
+        Scores below score_cutoff come back as 0, which lets the scorers stop early.
+        """
         if not str1 or not str2:
             return 0.0
         
-        ratio_score = fuzz.ratio(str1, str2)
-        partial_ratio = fuzz.partial_ratio(str1, str2)
-        token_sort_ratio = fuzz.token_sort_ratio(str1, str2)
-        token_set_ratio = fuzz.token_set_ratio(str1, str2)
-        
-        best_score = max(ratio_score, partial_ratio, token_sort_ratio, token_set_ratio)
+        best_score = max(
+            scorer(str1, str2, score_cutoff=score_cutoff) for scorer in self.SCORERS
+        )
         return float(best_score)
     
+    def score_candidates(
+        self,
+        queries: List[str],
+        normalized_candidates: List[str],
+        workers: int = 1,
+        score_cutoff: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Score every query against every candidate in one go.
+        
+        Returns:
+            A (queries x candidates) array with the same scores calculate_similarity gives
+        """
+        scores = np.zeros((len(queries), len(normalized_candidates)), dtype=np.float64)
+        
+        for scorer in self.SCORERS:
+            np.maximum(
+                scores,
+                process.cdist(
+                    queries, normalized_candidates,
+                    scorer=scorer, dtype=np.float64, workers=workers,
+                    score_cutoff=score_cutoff
+                ),
+                out=scores
+            )
+        
+        return scores
+    
+    def _shared_chars(
+        self,
+        query: str,
+        index: BrandIndex,
+        positions: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Count how many characters each brand name has in common with the query, repeats included."""
+        shared = np.zeros(len(index), dtype=np.int32)
+        
+        for char, count in Counter(query).items():
+            entry = index.char_counts.get(char)
+            if entry is not None:
+                # Each brand is listed once per character, so plain fancy-index adds are safe
+                brand_positions, counts = entry
+                shared[brand_positions] += np.minimum(counts, count)
+        
+        return shared if positions is None else shared[positions]
+    
+    def score_query(
+        self,
+        query: str,
+        index: BrandIndex,
+        positions: Optional[np.ndarray] = None,
+        score_cutoff: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Score one normalized name against the brands at positions (default: all of them).
+        
+        Gives the same scores as score_candidates, but with a cutoff the
+        bounded scorers skip brands that don't share enough characters to reach it.
+        """
+        if positions is None:
+            names = index.names
+            lengths = index.lengths
+        else:
+            names = [index.names[i] for i in positions]
+            lengths = index.lengths[positions]
+        
+        scores = np.zeros(len(names), dtype=np.float64)
+        
+        reachable = {}
+        if score_cutoff:
+            # Both names are normalized, so sorting their words doesn't change
+            # which characters they have
+            shared = self._shared_chars(query, index, positions)
+            query_len = len(query)
+            whole_best = 200.0 * shared / (lengths + query_len)
+            partial_best = 200.0 * shared / np.maximum(np.minimum(lengths, query_len) + shared, 1)
+            
+            for scorer in self.WHOLE_BOUNDED_SCORERS:
+                reachable[scorer] = np.flatnonzero(whole_best >= score_cutoff - 1e-9)
+            for scorer in self.PARTIAL_BOUNDED_SCORERS:
+                reachable[scorer] = np.flatnonzero(partial_best >= score_cutoff - 1e-9)
+        
+        for scorer in self.SCORERS:
+            scorer_positions = reachable.get(scorer)
+            
+            if scorer_positions is None:
+                np.maximum(
+                    scores,
+                    process.cdist(
+                        [query], names,
+                        scorer=scorer, dtype=np.float64, score_cutoff=score_cutoff
+                    )[0],
+                    out=scores
+                )
+            elif len(scorer_positions):
+                row = process.cdist(
+                    [query], [names[i] for i in scorer_positions],
+                    scorer=scorer, dtype=np.float64, score_cutoff=score_cutoff
+                )[0]
+                scores[scorer_positions] = np.maximum(scores[scorer_positions], row)
+        
+        return scores
+    
+    def _get_status(self, score: float) -> str:
+        """Turn a similarity score into a match status."""
+        if score >= self.auto_accept_threshold:
+            return 'auto_accept'
+        elif score >= self.manual_review_threshold:
+            return 'manual_review'
+        return 'reject'
+    
+    def _pick_best(
+        self,
+        scores: np.ndarray,
+        index: BrandIndex,
+        positions: Optional[np.ndarray] = None
+    ) -> Tuple[Optional[str], Optional[Dict], float, str]:
+        """
+        Pick the best brand from a row of scores for the brands at positions
+        (default: all of them).
+        
+        Scores are cut off at reject_threshold, so a name with nothing close
+        enough comes back with no match and a score of 0.
+        """
+        best_index = int(np.argmax(scores))
+        best_score = float(scores[best_index])
+        
+        if best_score <= 0:
+            return None, None, 0.0, 'reject'
+        
+        if positions is not None:
+            best_index = int(positions[best_index])
+        return index.ids[best_index], index.datas[best_index], best_score, self._get_status(best_score)
+    
+    def _top_matches(
+        self,
+        query: str,
+        index: BrandIndex,
+        limit: int
+    ) -> List[Tuple[Dict, float]]:
+        """
+        Find the limit best-scoring brands for a query, best first.
+        
+        The brands sharing the most characters with the query are scored
+        first. No top match can score under the limit-th best of those, so
+        that becomes the cutoff for scoring the rest.
+        """
+        score_cutoff = None
+        if len(index) > self.TOP_MATCH_SEEDS and limit <= self.TOP_MATCH_SEEDS:
+            shared = self._shared_chars(query, index)
+            seeds = np.argpartition(-shared, self.TOP_MATCH_SEEDS)[:self.TOP_MATCH_SEEDS]
+            seed_scores = self.score_query(query, index, seeds)
+            limit_best = float(np.partition(seed_scores, -limit)[-limit])
+            if limit_best > 1:
+                # A little under, since rapidfuzz rounds the cutoff and could drop a tie
+                score_cutoff = limit_best - 0.01
+        
+        scores = self.score_query(query, index, score_cutoff=score_cutoff)
+        
+        # Stable sort keeps ties in brand order
+        top_indices = np.argsort(-scores, kind='stable')[:limit]
+        return [(index.datas[i], float(scores[i])) for i in top_indices]
+    
     def find_best_match(
         self,
         query: str,
-        candidates: List[Tuple[str, Dict]],
-        normalized_candidates: Optional[List[str]] = None
-    ) -> Tuple[Optional[Dict], float, str]:
-        """Find the best match for a company name."""
-        if not query or not candidates:
-            return None, 0.0, 'reject'
+        candidates: Optional[Union[BrandIndex, List[Tuple[str, Dict]]]] = None,
+        top_k: int = 0
+    ) -> Tuple[Optional[str], Optional[Dict], float, str, List[Tuple[Dict, float]]]:
+        """
+        Find the best match for a company name.
         
-        best_match = None
-        best_score = 0.0
+        Returns:
+            (brand_id, best_match, score, status, top_matches), where
+            top_matches holds the top_k matches (as find_all_matches gives
+            them) when the name needs a manual review, and is empty otherwise
+        """
+        index = self.preprocess(candidates)
+        if not query or not index:
+            return None, None, 0.0, 'reject', []
         
-        if normalized_candidates is None:
-            normalized_candidates = [cand[0] for cand in candidates]
+        best_match = self._find_best(query, index)
         
-        for i, (normalized_cand, brand_data) in enumerate(candidates):
-            score = self.calculate_similarity(query, normalized_candidates[i])
+        top_matches = []
+        if top_k and best_match[3] == 'manual_review':
+            top_matches = self._top_matches(query, index, top_k)
+        
+        return (*best_match, top_matches)
+    
+    def _find_best(
+        self,
+        query: str,
+        index: BrandIndex
+    ) -> Tuple[Optional[str], Optional[Dict], float, str]:
+        """Find the best match for a non-empty company name."""
+        score_cutoff = self.reject_threshold
+        
+        # A confident match among the shortlist is good enough; anything
+        # less gets checked against every brand
+        shortlist = self._shortlist(query, index)
+        if shortlist is not None:
+            scores = self.score_query(query, index, shortlist, score_cutoff=score_cutoff)
+            best_match = self._pick_best(scores, index, shortlist)
+            if best_match[3] == 'auto_accept':
+                return best_match
             
-            if score > best_score:
-                best_score = score
-                best_match = brand_data
-        
-        if best_score >= self.auto_accept_threshold:
-            status = 'auto_accept'
-        elif best_score >= self.manual_review_threshold:
-            status = 'manual_review'
-        else:
-            status = 'reject'
+            # No brand scoring under the shortlist's best can win, so the
+            # scorers can give up on a pair as soon as it falls below that
+            # (a little under, since rapidfuzz rounds the cutoff and could drop a tie)
+            score_cutoff = max(score_cutoff, best_match[2] - 0.01)
+        
+        scores = self.score_query(query, index, score_cutoff=score_cutoff)
+        return self._pick_best(scores, index)
+    
+    def find_best_matches(
+        self,
+        queries: List[str],
+        candidates: Optional[Union[BrandIndex, List[Tuple[str, Dict]]]] = None,
+        top_k: int = 0,
+        workers: int = -1
+    ) -> List[Tuple[Optional[str], Optional[Dict], float, str, List[Tuple[Dict, float]]]]:
+        """
+        Find the best match for many company names at once.
+        
+        Gives the same results as calling find_best_match for each name, but
+        every chunk of names is scored against every brand in one cdist call,
+        spread over workers threads (-1 for every CPU core).
+        """
+        index = self.preprocess(candidates)
+        if not index:
+            return [(None, None, 0.0, 'reject', []) for _ in queries]
+        
+        # Fewer queries per chunk the more brands there are, so memory stays bounded
+        chunk_size = max(1, min(self.QUERY_CHUNK_SIZE, self.SCORE_MEMORY_BUDGET // (16 * len(index))))
         
-        return best_match, best_score, status
+        results = []
+        for start in range(0, len(queries), chunk_size):
+            chunk = queries[start:start + chunk_size]
+            scores = self.score_candidates(
+                chunk, index.names,
+                workers=workers, score_cutoff=self.reject_threshold
+            )
+            
+            for query, row in zip(chunk, scores):
+                if not query:
+                    results.append((None, None, 0.0, 'reject', []))
+                    continue
+                
+                # Same rule as find_best_match: a confident match among the
+                # shortlist wins even if another brand scores higher
+                best_match = None
+                shortlist = self._shortlist(query, index)
+                if shortlist is not None:
+                    best_match = self._pick_best(row[shortlist], index, shortlist)
+                if best_match is None or best_match[3] != 'auto_accept':
+                    best_match = self._pick_best(row, index)
+                
+                top_matches = []
+                if top_k and best_match[3] == 'manual_review':
+                    top_matches = self._top_matches(query, index, top_k)
+                results.append((*best_match, top_matches))
+        
+        return results
     
     def find_all_matches(
         self,
         query: str,
-        candidates: List[Tuple[str, Dict]],
-        normalized_candidates: Optional[List[str]] = None,
+        candidates: Optional[Union[BrandIndex, List[Tuple[str, Dict]]]] = None,
         limit: int = 5
     ) -> List[Tuple[Dict, float]]:
         """Find top N matches for manual review."""
-        if not query or not candidates:
+        index = self.preprocess(candidates)
+        if not query or not index or limit <= 0:
             return []
         
-        matches = []
-        
-        if normalized_candidates is None:
-            normalized_candidates = [cand[0] for cand in candidates]
-        
-        for i, (normalized_cand, brand_data) in enumerate(candidates):
-            score = self.calculate_similarity(query, normalized_candidates[i])
-            matches.append((brand_data, score))
-        
-        matches.sort(key=lambda x: x[1], reverse=True)
-        return matches[:limit]
+        return self._top_matches(query, index, limit)
 
 
 # ============================================================================
@@ -219,11 +808,45 @@ class FuzzyMatcher:
 # ============================================================================
 
 class FirebaseClient:
-    """Handles talking to Firebase - reading and writing brand information."""
+    """
+    Handles talking to Firebase - reading and writing brand information.
+    Updates are batched, so call flush() when you're done to write them all.
     
-    def __init__(self, credentials_path: Optional[str] = None, project_id: Optional[str] = None):
+    Batches are committed with the async Firestore client on an event loop
+    running in a background thread, so many commits can be in flight at once
+    while the caller keeps queueing updates. Once max_pending_commits batches
+    are waiting on commits, queueing more waits for the oldest to finish. A
+    batch that writes to a document an earlier batch is still writing waits
+    for it, so updates to each document land in the order they were queued.
+    """
+    
+    # Firestore rejects batches with more than 500 writes, so stay a bit under
+    BATCH_SIZE = 450
+    
+    def __init__(
+        self,
+        credentials_path: Optional[str] = None,
+        project_id: Optional[str] = None,
+        max_concurrent_commits: int = 20,
+        max_pending_commits: int = 40,
+        brands_cache_ttl: float = 3600.0,
+        brands_cache_path: Optional[str] = None
+    ):
         self.db = None
+        self.async_db = None
         self.initialized = False
+        self.max_concurrent_commits = max_concurrent_commits
+        self.max_pending_commits = max_pending_commits
+        self.brands_cache_ttl = brands_cache_ttl
+        self.brands_cache_path = brands_cache_path
+        self._brands_cache = None
+        self._brands_cache_ts = 0.0
+        self._pending = {}
+        self._loop = None
+        self._commit_slots = None
+        self._commits = []
+        self._failed_writes = []
+        self._in_flight = {}
         
         if credentials_path:
             self.initialize(credentials_path, project_id)
@@ -238,15 +861,37 @@ class FirebaseClient:
                 firebase_admin.initialize_app(cred)
             
             self.db = firestore.client()
+            self.async_db = firestore_async.client()
+            self._pending = {}
+            
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, daemon=True).start()
+            
             self.initialized = True
         except Exception as e:
             raise Exception(f"Failed to initialize Firebase: {str(e)}")
     
-    def get_all_brands(self) -> Dict[str, Dict]:
-        """Get all brands from Firebase."""
+    def get_all_brands(self, refresh: bool = False) -> Dict[str, Dict]:
+        """
+        Get all brands from Firebase.
+        
+        Brands are kept in memory (and in brands_cache_path, if set) for
+        brands_cache_ttl seconds, so repeated calls don't re-read the collection.
+        Pass refresh=True to skip the cache.
+        """
         if not self.initialized:
             raise Exception("Firebase not initialized. Call initialize() first.")
         
+        if (
+            not refresh
+            and self._brands_cache is not None
+            and time.time() - self._brands_cache_ts < self.brands_cache_ttl
+        ):
+            return self._brands_cache
+        
+        if not refresh and self._load_brands_cache_file():
+            return self._brands_cache
+        
         brands = {}
         brands_ref = self.db.collection('brands')
         
@@ -255,18 +900,59 @@ class FirebaseClient:
             brand_data['brand_id'] = doc.id
             brands[doc.id] = brand_data
         
+        self._brands_cache = brands
+        self._brands_cache_ts = time.time()
+        self._save_brands_cache_file()
+        
         return brands
     
+    def _load_brands_cache_file(self) -> bool:
+        """Load brands saved by an earlier run, if they're fresh enough."""
+        if not self.brands_cache_path or not Path(self.brands_cache_path).exists():
+            return False
+        
+        try:
+            with open(self.brands_cache_path, 'rb') as f:
+                saved = orjson.loads(f.read())
+        except Exception as e:
+            print(f"Ignoring unreadable brand cache {self.brands_cache_path}: {str(e)}")
+            return False
+        
+        if saved.get('project_id') != self.db.project:
+            return False
+        if time.time() - saved.get('saved_at', 0) >= self.brands_cache_ttl:
+            return False
+        
+        self._brands_cache = saved['brands']
+        self._brands_cache_ts = saved['saved_at']
+        return True
+    
+    def _save_brands_cache_file(self):
+        """Save brands so the next run can skip reading them from Firebase."""
+        if not self.brands_cache_path:
+            return
+        
+        saved = {
+            'project_id': self.db.project,
+            'saved_at': self._brands_cache_ts,
+            'brands': self._brands_cache,
+        }
+        
+        try:
+            # Timestamps and other Firestore types are saved as strings
+            with open(self.brands_cache_path, 'wb') as f:
+                f.write(orjson.dumps(saved, default=str))
+        except Exception as e:
+            print(f"Error saving brand cache {self.brands_cache_path}: {str(e)}")
+    
     def get_brand_name_field(self) -> str:
         """Figure out which field has the brand name."""
         if not self.initialized:
             raise Exception("Firebase not initialized. Call initialize() first.")
         
-        brands_ref = self.db.collection('brands').limit(10)
         name_fields = ['name', 'company_name', 'brand_name', 'title']
         
-        for doc in brands_ref.stream():
-            brand_data = doc.to_dict()
+        for brand_data in itertools.islice(self.get_all_brands().values(), 10):
             for field in name_fields:
                 if field in brand_data and isinstance(brand_data[field], str):
                     return field
@@ -279,10 +965,8 @@ class FirebaseClient:
             raise Exception("Firebase not initialized. Call initialize() first.")
         
         social_keys = set()
-        brands_ref = self.db.collection('brands')
         
-        for doc in brands_ref.stream():
-            brand_data = doc.to_dict()
+        for brand_data in self.get_all_brands().values():
             social_data = brand_data.get('social', {})
             
             if isinstance(social_data, dict):
@@ -304,17 +988,11 @@ class FirebaseClient:
             return True
         
         try:
-            doc_ref = self.db.collection('brands').document(brand_id)
-            
-            doc = doc_ref.get()
-            existing_social = {}
-            if doc.exists:
-                existing_data = doc.to_dict()
-                existing_social = existing_data.get('social', {})
-            
-            updated_social = {**existing_social, **social_updates}
-            doc_ref.update({'social': updated_social})
-            return True
+            updates = {
+                self.db.field_path('social', key): value
+                for key, value in social_updates.items()
+            }
+            return self._queue_update(brand_id, updates)
         
         except Exception as e:
             print(f"Error updating social for brand {brand_id}: {str(e)}")
@@ -335,7 +1013,6 @@ class FirebaseClient:
             return True
         
         try:
-            doc_ref = self.db.collection('brands').document(brand_id)
             updates = {}
             
             if parent_company is not None:
@@ -344,7 +1021,7 @@ class FirebaseClient:
                 updates['parent_id'] = parent_id
             
             if updates:
-                doc_ref.update(updates)
+                return self._queue_update(brand_id, updates)
             
             return True
         
@@ -366,44 +1043,219 @@ class FirebaseClient:
             return True
         
         try:
-            doc_ref = self.db.collection('brands').document(parent_id)
-            
-            doc = doc_ref.get()
-            existing_subsidiaries = {}
-            if doc.exists:
-                existing_data = doc.to_dict()
-                existing_subsidiaries = existing_data.get('subsidiaries', {})
-            
-            updated_subsidiaries = {**existing_subsidiaries}
-            for sub_id in subsidiary_ids:
-                updated_subsidiaries[sub_id] = True
+            updates = {
+                self.db.field_path('subsidiaries', sub_id): True
+                for sub_id in subsidiary_ids
+            }
             
-            doc_ref.update({'subsidiaries': updated_subsidiaries})
+            if updates:
+                return self._queue_update(parent_id, updates)
             return True
         
         except Exception as e:
             print(f"Error updating subsidiaries for parent {parent_id}: {str(e)}")
             return False
+    
+    def _queue_update(self, brand_id: str, updates: Dict[str, Any]) -> bool:
+        """
+        Queue an update to a brand, committing the queue once it's a full batch.
+        
+        Updates to a document that's already queued are merged into its
+        existing write (later values win), so each document is written once
+        per batch.
+        
+        Returns:
+            False if there's no brand id to update
+        """
+        # document(None) would make up a new id, and the update would fail
+        if not brand_id:
+            print("Error queueing update: no brand id")
+            return False
+        
+        doc_ref = self.async_db.collection('brands').document(brand_id)
+        pending = self._pending.get(doc_ref.path)
+        if pending is None:
+            self._pending[doc_ref.path] = (doc_ref, dict(updates))
+        else:
+            pending[1].update(updates)
+        
+        if len(self._pending) >= self.BATCH_SIZE:
+            self._commit_batch()
+        return True
+    
+    async def _commit(
+        self,
+        writes: List[Tuple[Any, Dict[str, Any]]],
+        after: List[concurrent.futures.Future]
+    ) -> List[Tuple[str, Exception]]:
+        """
+        Commit a batch of (doc_ref, updates) writes, waiting for a free slot first.
+        
+        The commits in after (earlier batches writing to the same documents)
+        are waited for first, so the later values always win.
+        
+        Firestore writes a batch all or nothing, so if the batch fails (say
+        one of its brands was deleted), each update is retried on its own.
+        
+        Returns:
+            (path, error) for every update that failed on its own
+        """
+        if after:
+            await asyncio.wait([asyncio.wrap_future(future) for future in after])
+        
+        if self._commit_slots is None:
+            self._commit_slots = asyncio.Semaphore(self.max_concurrent_commits)
+        
+        async with self._commit_slots:
+            batch = self.async_db.batch()
+            for doc_ref, updates in writes:
+                batch.update(doc_ref, updates)
+            
+            try:
+                await batch.commit()
+                return []
+            except Exception as e:
+                print(f"Error committing batch of {len(writes)} updates, retrying one at a time: {str(e)}")
+            
+            results = await asyncio.gather(
+                *(doc_ref.update(updates) for doc_ref, updates in writes),
+                return_exceptions=True
+            )
+        
+        return [
+            (doc_ref.path, result)
+            for (doc_ref, _), result in zip(writes, results)
+            if isinstance(result, Exception)
+        ]
+    
+    def _commit_batch(self):
+        """Start committing the queued updates in the background and begin a new queue."""
+        writes = list(self._pending.values())
+        after = {
+            self._in_flight[path] for path in self._pending
+            if path in self._in_flight
+        }
+        
+        future = asyncio.run_coroutine_threadsafe(self._commit(writes, list(after)), self._loop)
+        self._commits.append((future, list(self._pending)))
+        for path in self._pending:
+            self._in_flight[path] = future
+        self._pending = {}
+        
+        self._reap_commits()
+    
+    def _reap_commits(self):
+        """
+        Drop finished commits, keeping any failures for flush() to report.
+        
+        If too many are still outstanding, waits for the oldest first, so
+        queued batches can't pile up faster than they're written.
+        """
+        excess = len(self._commits) - self.max_pending_commits
+        if excess > 0:
+            concurrent.futures.wait([future for future, _ in self._commits[:excess]])
+        
+        outstanding = []
+        for future, paths in self._commits:
+            if not future.done():
+                outstanding.append((future, paths))
+            elif future.exception() is not None:
+                self._failed_writes.extend((path, future.exception()) for path in paths)
+            else:
+                self._failed_writes.extend(future.result())
+        self._commits = outstanding
+        
+        self._in_flight = {
+            path: future for path, future in self._in_flight.items()
+            if not future.done()
+        }
+    
+    def brand_path(self, brand_id: str) -> str:
+        """Get the document path a brand's updates are queued under."""
+        return f"brands/{brand_id}"
+    
+    def flush(self) -> List[str]:
+        """
+        Commit any queued updates and wait for all commits to finish.
+        
+        A batch that fails is retried one update at a time, so only the
+        updates that fail on their own are lost.
+        
+        Returns:
+            Paths of the documents whose updates since the last flush
+            weren't written (empty if everything was)
+        """
+        return self.flush_async().result()
+    
+    def flush_async(self) -> concurrent.futures.Future:
+        """
+        Commit any queued updates without waiting for them.
+        
+        Only updates queued before the call are covered, so the caller can
+        keep queueing more while another thread waits on the result.
+        
+        Returns:
+            A future for what flush() would return
+        """
+        if not self.initialized:
+            raise Exception("Firebase not initialized. Call initialize() first.")
+        
+        if self._pending:
+            self._commit_batch()
+        
+        commits, self._commits = self._commits, []
+        failed, self._failed_writes = self._failed_writes, []
+        return asyncio.run_coroutine_threadsafe(self._failed_paths(commits, failed), self._loop)
+    
+    async def _failed_paths(
+        self,
+        commits: List[Tuple[concurrent.futures.Future, List[str]]],
+        failed: List[Tuple[str, Exception]]
+    ) -> List[str]:
+        """Wait for the commits, then report every update that wasn't written."""
+        for future, paths in commits:
+            try:
+                failed.extend(await asyncio.wrap_future(future))
+            except Exception as e:
+                failed.extend((path, e) for path in paths)
+        
+        for path, error in failed:
+            print(f"Error updating {path}: {str(error)}")
+        
+        return [path for path, _ in failed]
 
 
 # ============================================================================
 # MAIN UPLOADER
 # ============================================================================
 
+# Output files are indented like json.dump(indent=2) gave them; brand data
+# can have non-string keys or Firestore values json can't handle, like timestamps
+_REVIEW_FILE_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+
 class DataUploader:
     """Main class for uploading contact and subsidiary data to Firebase."""
     
+    # Shorter lists of names aren't worth scoring in parallel
+    MIN_PARALLEL_MATCHES = 512
+    
+    # How many contacts are read in before they're matched
+    CONTACT_BATCH_SIZE = 4096
+    
     def __init__(
         self,
         firebase_client: FirebaseClient,
         fuzzy_matcher: FuzzyMatcher,
         dry_run: bool = False,
-        single_company: Optional[str] = None
+        single_company: Optional[str] = None,
+        workers: Optional[int] = None
     ):
         self.firebase_client = firebase_client
         self.fuzzy_matcher = fuzzy_matcher
         self.dry_run = dry_run
         self.single_company = single_company
+        self.workers = workers
         
         self.stats = {
             'contacts_processed': 0,
@@ -423,79 +1275,113 @@ class DataUploader:
         
         self.manual_review_queue = []
         self.unmatched_companies = []
-        self.brands_cache = None
+        self._brand_datas = None
+        self.brand_index = None
         self.brand_name_field = None
         self.social_keys_mapping = None
     
     def load_brands_cache(self):
         """Load all brands from Firebase."""
         print("Loading brands from Firebase...")
-        self.brands_cache = self.firebase_client.get_all_brands()
+        # Each brand's data carries its own brand_id, so the ids aren't kept separately
+        self._brand_datas = list(self.firebase_client.get_all_brands().values())
         self.brand_name_field = self.firebase_client.get_brand_name_field()
-        print(f"Loaded {len(self.brands_cache)} brands")
+        print(f"Loaded {len(self._brand_datas)} brands")
         
         existing_keys = self.firebase_client.get_existing_social_keys()
         print(f"Found existing social keys: {existing_keys}")
         
-        self.social_keys_mapping = {
-            'twitter_url': 'twitter',
-            'facebook_url': 'facebook',
-            'bluesky_url': 'bluesky',
-            'ir_email': 'ir_email',
-            'cs_email': 'cs_email',
-            'ir_page': 'ir_page',
-            'cs_page': 'cs_page',
-            'domain': 'website',
-        }
+        self.social_keys_mapping = SOCIAL_KEYS_MAPPING
     
-    def prepare_brands_for_matching(self) -> List[Tuple[str, Dict]]:
-        """Prepare brands for fuzzy matching."""
-        if not self.brands_cache:
+    def prepare_brands_for_matching(self) -> BrandIndex:
+        """Index the brands and bind them to the fuzzy matcher."""
+        if not self._brand_datas:
             self.load_brands_cache()
         
-        brands_for_matching = []
-        for brand_id, brand_data in self.brands_cache.items():
-            brand_name = brand_data.get(self.brand_name_field, '')
-            normalized_name = normalize_company_name(brand_name)
-            brands_for_matching.append((normalized_name, brand_data))
-        
-        return brands_for_matching
+        normalized_names = normalize_company_names(
+            [brand_data.get(self.brand_name_field, '') for brand_data in self._brand_datas]
+        )
+        self.brand_index = self.fuzzy_matcher.bind(
+            BrandIndex.build(zip(normalized_names, self._brand_datas))
+        )
+        return self.brand_index
+    
+    def iter_contacts(self, filepath: str) -> Iterator[Dict]:
+        """Read the contacts CSV file a batch of rows at a time."""
+        if pa is not None:
+            for batch in iter_csv_batches(filepath, CONTACT_COLUMNS):
+                yield from filter_contacts_data(batch.to_pylist())
+        else:
+            rows = iter_csv_rows(filepath, CONTACT_COLUMNS)
+            while batch := list(itertools.islice(rows, self.CONTACT_BATCH_SIZE)):
+                yield from filter_contacts_data(batch)
     
     def load_contacts_csv(self, filepath: str) -> List[Dict]:
         """Load contacts CSV file."""
-        contacts = []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                contacts.append(row)
-        
-        contacts = filter_contacts_data(contacts)
-        return contacts
+        return list(self.iter_contacts(filepath))
     
     def load_subsidiary_csv(self, filepath: str) -> List[Dict]:
         """Load subsidiary CSV file."""
-        subsidiaries = []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                subsidiaries.append(row)
+        if pa is not None:
+            filtered = []
+            error_count = 0
+            incomplete_count = 0
+            for batch in iter_csv_batches(filepath, SUBSIDIARY_COLUMNS):
+                table, batch_errors, batch_incomplete = filter_subsidiary_table(
+                    pa.Table.from_batches([batch])
+                )
+                filtered.extend(table.to_pylist())
+                error_count += batch_errors
+                incomplete_count += batch_incomplete
+        else:
+            subsidiaries = list(iter_csv_rows(filepath, SUBSIDIARY_COLUMNS))
+            filtered, error_count, incomplete_count = filter_subsidiary_data(subsidiaries)
         
-        filtered, error_count, incomplete_count = filter_subsidiary_data(subsidiaries)
         print(f"Filtered {error_count} extraction errors")
         print(f"Excluded {incomplete_count} incomplete subsidiary entries")
         
         return filtered
     
-    def process_contacts(
-        self,
-        contacts: List[Dict],
-        brands_for_matching: List[Tuple[str, Dict]]
-    ):
-        """Process and upload contact information."""
-        print("\n" + "="*60)
-        print("Processing Contacts")
-        print("="*60)
+    def match_names(self, names: List[str]) -> List[Tuple[Optional[str], Optional[Dict], float, str, List[Tuple[Dict, float]]]]:
+        """
+        Match normalized names against the bound brands, in the same order.
+        
+        Each match is (brand_id, best_match, score, status, top_matches), with
+        the top 5 matches only filled in when the name needs a manual review.
+        
+        Each distinct name is only matched once. Big lists are scored in one
+        batch across worker threads, one per CPU core unless workers says
+        otherwise; otherwise each name is matched on its own, which lets the
+        matcher skip brands that can't score high enough.
+        """
+        unique_names = list(dict.fromkeys(names))
+        workers = self.workers or os.cpu_count() or 1
+        
+        if workers <= 1 or len(unique_names) < self.MIN_PARALLEL_MATCHES:
+            results = [
+                self.fuzzy_matcher.find_best_match(name, top_k=5)
+                for name in unique_names
+            ]
+        else:
+            results = self.fuzzy_matcher.find_best_matches(
+                unique_names, top_k=5, workers=workers
+            )
+        
+        matches = dict(zip(unique_names, results))
+        return [matches[name] for name in names]
+    
+    def process_contacts(self, contacts: Iterable[Dict]):
+        """
+        Process and upload contact information.
+        
+        Contacts are matched CONTACT_BATCH_SIZE at a time, so they can be
+        streamed straight from iter_contacts.
+        """
+        logger.info("\n" + "="*60)
+        logger.info("Processing Contacts")
+        logger.info("="*60)
         
+        rows = []
         for contact in contacts:
             company_name = contact.get('company_clean', '').strip()
             
@@ -505,14 +1391,30 @@ class DataUploader:
             if not company_name:
                 continue
             
-            self.stats['contacts_processed'] += 1
+            rows.append((contact, company_name))
             
-            normalized_name = normalize_company_name(company_name)
+            if len(rows) >= self.CONTACT_BATCH_SIZE:
+                self._process_contact_batch(rows)
+                rows = []
+        
+        if rows:
+            self._process_contact_batch(rows)
+        
+        logger.info("\nContacts Summary:")
+        logger.info("  Processed: %d", self.stats['contacts_processed'])
+        logger.info("  Auto-accepted: %d", self.stats['contacts_auto_accepted'])
+        logger.info("  Manual review: %d", self.stats['contacts_manual_review'])
+        logger.info("  Rejected: %d", self.stats['contacts_rejected'])
+    
+    def _process_contact_batch(self, rows: List[Tuple[Dict, str]]):
+        """Match and upload a batch of (contact, company_name) rows."""
+        normalized_names = normalize_company_names([company_name for _, company_name in rows])
+        matches = self.match_names(normalized_names)
+        
+        for (contact, company_name), normalized_name, match in zip(rows, normalized_names, matches):
+            brand_id, best_match, score, status, top_matches = match
             
-            best_match, score, status = self.fuzzy_matcher.find_best_match(
-                normalized_name,
-                brands_for_matching
-            )
+            self.stats['contacts_processed'] += 1
             
             if status == 'reject' or not best_match:
                 self.stats['contacts_rejected'] += 1
@@ -522,11 +1424,9 @@ class DataUploader:
                     'normalized': normalized_name,
                     'score': score
                 })
-                print(f"REJECTED: {company_name} (score: {score:.1f}%)")
+                logger.debug("REJECTED: %s (score: %.1f%%)", company_name, score)
                 continue
             
-            brand_id = best_match.get('brand_id')
-            
             if status == 'auto_accept':
                 self.stats['contacts_auto_accepted'] += 1
                 self.stats['contacts_matched'] += 1
@@ -540,27 +1440,18 @@ class DataUploader:
                     'brand_match': best_match,
                     'score': score,
                     'contact_data': contact,
-                    'top_matches': self.fuzzy_matcher.find_all_matches(
-                        normalized_name, brands_for_matching, limit=5
-                    )
+                    'top_matches': top_matches
                 })
-                print(f"MANUAL REVIEW: {company_name} -> {best_match.get(self.brand_name_field)} (score: {score:.1f}%)")
-        
-        print(f"\nContacts Summary:")
-        print(f"  Processed: {self.stats['contacts_processed']}")
-        print(f"  Auto-accepted: {self.stats['contacts_auto_accepted']}")
-        print(f"  Manual review: {self.stats['contacts_manual_review']}")
-        print(f"  Rejected: {self.stats['contacts_rejected']}")
+                logger.debug(
+                    "MANUAL REVIEW: %s -> %s (score: %.1f%%)",
+                    company_name, best_match.get(self.brand_name_field), score
+                )
     
-    def process_subsidiaries(
-        self,
-        subsidiaries: List[Dict],
-        brands_for_matching: List[Tuple[str, Dict]]
-    ):
+    def process_subsidiaries(self, subsidiaries: List[Dict]):
         """Process and upload subsidiary information."""
-        print("\n" + "="*60)
-        print("Processing Subsidiaries")
-        print("="*60)
+        logger.info("\n" + "="*60)
+        logger.info("Processing Subsidiaries")
+        logger.info("="*60)
         
         parent_subsidiaries = defaultdict(list)
         
@@ -571,19 +1462,34 @@ class DataUploader:
             if parent_name and subsidiary_raw:
                 parent_subsidiaries[parent_name].append(row)
         
-        for parent_name, subs_list in parent_subsidiaries.items():
-            if self.single_company and parent_name.lower() != self.single_company.lower():
-                continue
+        parents = [
+            (parent_name, subs_list)
+            for parent_name, subs_list in parent_subsidiaries.items()
+            if not self.single_company or parent_name.lower() == self.single_company.lower()
+        ]
+        normalized_parents = normalize_company_names([parent_name for parent_name, _ in parents])
+        parent_matches = self.match_names(normalized_parents)
+        
+        # Subsidiaries are only looked at for parents that matched
+        subsidiary_names = [
+            sub_row.get('subsidiary_name_raw', '').strip()
+            for (_, subs_list), (_, parent_match, _, parent_status, _) in zip(parents, parent_matches)
+            if parent_status != 'reject' and parent_match
+            for sub_row in subs_list
+        ]
+        normalized_subs = normalize_company_names(subsidiary_names)
+        sub_matches = zip(
+            subsidiary_names, normalized_subs,
+            self.match_names(normalized_subs)
+        )
+        
+        for (parent_name, subs_list), normalized_parent, parent_result in zip(
+            parents, normalized_parents, parent_matches
+        ):
+            parent_brand_id, parent_match, parent_score, parent_status, parent_top_matches = parent_result
             
             self.stats['subsidiaries_processed'] += 1
             
-            normalized_parent = normalize_company_name(parent_name)
-            
-            parent_match, parent_score, parent_status = self.fuzzy_matcher.find_best_match(
-                normalized_parent,
-                brands_for_matching
-            )
-            
             if parent_status == 'reject' or not parent_match:
                 self.stats['subsidiaries_rejected'] += 1
                 self.unmatched_companies.append({
@@ -592,20 +1498,13 @@ class DataUploader:
                     'normalized': normalized_parent,
                     'score': parent_score
                 })
-                print(f"REJECTED PARENT: {parent_name} (score: {parent_score:.1f}%)")
+                logger.debug("REJECTED PARENT: %s (score: %.1f%%)", parent_name, parent_score)
                 continue
             
-            parent_brand_id = parent_match.get('brand_id')
             matched_subsidiaries = []
             
-            for sub_row in subs_list:
-                subsidiary_name = sub_row.get('subsidiary_name_raw', '').strip()
-                normalized_sub = normalize_company_name(subsidiary_name)
-                
-                sub_match, sub_score, sub_status = self.fuzzy_matcher.find_best_match(
-                    normalized_sub,
-                    brands_for_matching
-                )
+            for subsidiary_name, normalized_sub, sub_result in itertools.islice(sub_matches, len(subs_list)):
+                sub_brand_id, sub_match, sub_score, sub_status, sub_top_matches = sub_result
                 
                 if sub_status == 'reject' or not sub_match:
                     self.unmatched_companies.append({
@@ -617,8 +1516,6 @@ class DataUploader:
                     })
                     continue
                 
-                sub_brand_id = sub_match.get('brand_id')
-                
                 if sub_status == 'auto_accept':
                     matched_subsidiaries.append((sub_brand_id, sub_match, sub_score))
                 elif sub_status == 'manual_review':
@@ -630,9 +1527,7 @@ class DataUploader:
                         'normalized': normalized_sub,
                         'subsidiary_brand': sub_match,
                         'score': sub_score,
-                        'top_matches': self.fuzzy_matcher.find_all_matches(
-                            normalized_sub, brands_for_matching, limit=5
-                        )
+                        'top_matches': sub_top_matches
                     })
             
             if parent_status == 'auto_accept' and matched_subsidiaries:
@@ -651,16 +1546,14 @@ class DataUploader:
                     'parent_brand': parent_match,
                     'score': parent_score,
                     'subsidiaries': subs_list,
-                    'top_matches': self.fuzzy_matcher.find_all_matches(
-                        normalized_parent, brands_for_matching, limit=5
-                    )
+                    'top_matches': parent_top_matches
                 })
         
-        print(f"\nSubsidiaries Summary:")
-        print(f"  Processed: {self.stats['subsidiaries_processed']}")
-        print(f"  Auto-accepted: {self.stats['subsidiaries_auto_accepted']}")
-        print(f"  Manual review: {self.stats['subsidiaries_manual_review']}")
-        print(f"  Rejected: {self.stats['subsidiaries_rejected']}")
+        logger.info("\nSubsidiaries Summary:")
+        logger.info("  Processed: %d", self.stats['subsidiaries_processed'])
+        logger.info("  Auto-accepted: %d", self.stats['subsidiaries_auto_accepted'])
+        logger.info("  Manual review: %d", self.stats['subsidiaries_manual_review'])
+        logger.info("  Rejected: %d", self.stats['subsidiaries_rejected'])
     
     def _upload_contact_info(
         self,
@@ -670,12 +1563,11 @@ class DataUploader:
         score: float
     ):
         """Upload contact information to Firebase."""
-        social_updates = {}
-        
-        for csv_field, firebase_key in self.social_keys_mapping.items():
-            value = contact.get(csv_field, '').strip()
-            if value:
-                social_updates[firebase_key] = value
+        social_updates = {
+            firebase_key: value
+            for csv_field, firebase_key in self.social_keys_mapping
+            if (value := contact.get(csv_field)) and (value := value.strip())
+        }
         
         if social_updates:
             success = self.firebase_client.update_brand_social(
@@ -684,10 +1576,10 @@ class DataUploader:
             
             if success:
                 mode = "[DRY RUN] " if self.dry_run else ""
-                print(f"{mode}Updated contacts for: {company_name} -> {brand_id} (score: {score:.1f}%)")
+                logger.debug("%sUpdated contacts for: %s -> %s (score: %.1f%%)", mode, company_name, brand_id, score)
             else:
                 self.stats['errors'] += 1
-                print(f"Error updating contacts for: {company_name}")
+                logger.error("Error updating contacts for: %s", company_name)
     
     def _upload_subsidiary_info(
         self,
@@ -705,7 +1597,10 @@ class DataUploader:
         
         if success:
             mode = "[DRY RUN] " if self.dry_run else ""
-            print(f"{mode}Updated subsidiaries for parent: {parent_name} ({len(subsidiary_ids)} subsidiaries)")
+            logger.debug(
+                "%sUpdated subsidiaries for parent: %s (%d subsidiaries)",
+                mode, parent_name, len(subsidiary_ids)
+            )
         
         for sub_id, sub_brand, sub_score in matched_subsidiaries:
             sub_success = self.firebase_client.update_brand_parent_info(
@@ -718,16 +1613,28 @@ class DataUploader:
             if not sub_success:
                 self.stats['errors'] += 1
     
+    def flush_writes(self):
+        """
+        Write out every update still queued in the Firebase client.
+        
+        Updates are already coalesced per brand and committed in batches as
+        they're queued; this only waits for the last of them.
+        """
+        failed_paths = self.firebase_client.flush()
+        if failed_paths:
+            self.stats['errors'] += len(failed_paths)
+            print(f"Error writing updates to {len(failed_paths)} brands in Firebase")
+    
     def save_manual_review_file(self, filepath: str):
         """Save manual review queue to JSON file."""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.manual_review_queue, f, indent=2, ensure_ascii=False)
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(self.manual_review_queue, option=_REVIEW_FILE_OPTIONS, default=str))
         print(f"\nSaved {len(self.manual_review_queue)} items to manual review file: {filepath}")
     
     def save_unmatched_file(self, filepath: str):
         """Save unmatched companies to JSON file."""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.unmatched_companies, f, indent=2, ensure_ascii=False)
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(self.unmatched_companies, option=_REVIEW_FILE_OPTIONS, default=str))
         print(f"Saved {len(self.unmatched_companies)} unmatched companies to: {filepath}")
     
     def print_summary(self):
@@ -764,11 +1671,21 @@ def main():
     parser.add_argument('--auto-accept-threshold', type=float, default=90.0, help='Auto-accept threshold (default: 90)')
     parser.add_argument('--manual-review-threshold', type=float, default=80.0, help='Manual review threshold (default: 80)')
     parser.add_argument('--output-dir', default='.', help='Output directory for review files (default: current dir)')
+    parser.add_argument('--brand-cache', help='File to save brands in, so later runs can skip loading them from Firebase')
+    parser.add_argument('--brand-cache-ttl', type=float, default=3600.0, help='How long saved brands stay fresh, in seconds (default: 3600)')
+    parser.add_argument('--workers', type=int, help='Threads to match names with (default: one per CPU core)')
+    parser.add_argument('--verbose', action='store_true', help='Print a line for every company matched, rejected or updated')
     
     args = parser.parse_args()
     
+    logging.basicConfig(stream=sys.stdout, format='%(message)s')
+    logger.setLevel(logging.DEBUG if args.verbose else logging.INFO)
+    
     print("Initializing Firebase...")
-    firebase_client = FirebaseClient()
+    firebase_client = FirebaseClient(
+        brands_cache_ttl=args.brand_cache_ttl,
+        brands_cache_path=args.brand_cache
+    )
     firebase_client.initialize(args.firebase_credentials, args.firebase_project)
     
     fuzzy_matcher = FuzzyMatcher(
@@ -781,22 +1698,23 @@ def main():
         firebase_client=firebase_client,
         fuzzy_matcher=fuzzy_matcher,
         dry_run=args.dry_run,
-        single_company=args.single_company
+        single_company=args.single_company,
+        workers=args.workers
     )
     
     uploader.load_brands_cache()
-    brands_for_matching = uploader.prepare_brands_for_matching()
-    
-    print(f"\nLoading contacts from: {args.contacts_csv}")
-    contacts = uploader.load_contacts_csv(args.contacts_csv)
-    print(f"Loaded {len(contacts)} contacts")
+    uploader.prepare_brands_for_matching()
     
     print(f"\nLoading subsidiaries from: {args.subsidiary_csv}")
     subsidiaries = uploader.load_subsidiary_csv(args.subsidiary_csv)
     print(f"Loaded {len(subsidiaries)} subsidiary rows")
     
-    uploader.process_contacts(contacts, brands_for_matching)
-    uploader.process_subsidiaries(subsidiaries, brands_for_matching)
+    # Contacts are read as they're processed
+    print(f"\nReading contacts from: {args.contacts_csv}")
+    uploader.process_contacts(uploader.iter_contacts(args.contacts_csv))
+    uploader.process_subsidiaries(subsidiaries)
+    
+    uploader.flush_writes()
     
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)